@@ -0,0 +1,46 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional compiled accelerator for SitemapTool.categorize_urls.
+Build in place with: cythonize -i _fast_categorize.pyx
+"""
+
+from libc.string cimport strstr
+
+
+def first_literal_hits(list urls, tuple literal_table):
+    """
+    Find, for each URL, the first category with a matching literal substring.
+
+    Args:
+        urls: URLs to scan
+        literal_table: One tuple of lower-cased UTF-8 literals per category, in priority order
+
+    Returns:
+        List with the index of the first matching category for each URL,
+        or len(literal_table) when no literal matches
+    """
+    cdef Py_ssize_t n_urls = len(urls)
+    cdef Py_ssize_t n_categories = len(literal_table)
+    cdef Py_ssize_t i, c
+    cdef Py_ssize_t hit
+    cdef bytes url_bytes
+    cdef bytes needle
+    cdef const char* haystack
+    cdef list hits = [n_categories] * n_urls
+
+    for i in range(n_urls):
+        url_bytes = (<str>urls[i]).lower().encode('utf-8')
+        haystack = url_bytes
+        hit = n_categories
+
+        for c in range(n_categories):
+            for needle in literal_table[c]:
+                if strstr(haystack, needle) != NULL:
+                    hit = c
+                    break
+            if hit != n_categories:
+                break
+
+        hits[i] = hit
+
+    return hits
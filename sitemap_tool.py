@@ -6,21 +6,173 @@ Supports Shopify stores with crawler authentication.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import aiohttp
+import asyncio
 import xml.etree.ElementTree as ET
 import csv
+import glob
 import json
+import mmap
 import re
 from urllib.parse import urljoin, urlparse
-from typing import Dict, List, Set, Optional
+from typing import Dict, Iterable, List, Set, Optional, Tuple, Union
 import time
 import argparse
+from array import array
 from datetime import datetime
 import sys
 import os
-from collections import defaultdict
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+
+# Optional fast JSON parser; the standard library is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional compiled categorization accelerator (see _fast_categorize.pyx)
+try:
+    import _fast_categorize
+except ImportError:
+    _fast_categorize = None
+
+# Optional vectorized string kernels for categorization and a native CSV
+# writer, used when the pyarrow_categorize and pyarrow_csv options are set
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pc = None
+    pa_csv = None
+
+
+# Sites larger than this get compact JSON output unless configured otherwise
+COMPACT_JSON_THRESHOLD = 50000
+
+# Tool log is written through a 1 MiB buffer and, by default, flushed every
+# N messages so it can still be followed live
+LOG_BUFFER_SIZE = 1 << 20
+LOG_FLUSH_INTERVAL = 1000
+
+# Product handle CSV is written through a 1 MiB buffer, or in Arrow record
+# batches of this many rows when the pyarrow writer is enabled
+CSV_BUFFER_SIZE = 1 << 20
+CSV_BATCH_SIZE = 10000
+
+# Report and data files are written through a 4 MiB buffer to a temporary
+# name, then renamed into place
+OUTPUT_BUFFER_SIZE = 4 << 20
+
+# Transient failures are retried with exponential backoff, both for the
+# requests session (sitemap discovery) and the aiohttp sitemap fetches
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Default age limit, in seconds, for reusing a previous export in incremental mode
+REUSE_MAX_AGE_S = 3600
+
+# JSON files above this size are memory-mapped for orjson instead of read into bytes
+MMAP_JSON_THRESHOLD = 4 << 20
+
+# Sitemap protocol element tags
+_SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+_LOC_TAG = _SITEMAP_NS + 'loc'
+_ENTRY_TAGS = (_SITEMAP_NS + 'url', _SITEMAP_NS + 'sitemap')
+
+# Product handle naming classes, searched in priority order: an "es" code
+# anywhere in the handle wins over an "ah" code, which wins over a plain number.
+# _NUMBER_RE alone also sorts collection handles.
+_ES_CODE_RE = re.compile(r'es\d')
+_AH_CODE_RE = re.compile(r'ah\d')
+_NUMBER_RE = re.compile(r'\d')
+
+# Separator lines for console and report output
+_BAR40 = "=" * 40
+_BAR60 = "=" * 60
+_BAR80 = "=" * 80
+_RULE40 = "-" * 40
+_RULE50 = "-" * 50
+_RULE60 = "-" * 60
+
+
+def _loads_json(data: bytes):
+    """Parse JSON bytes with orjson when available, else the standard library."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _read_json_file(path: str, size: Optional[int] = None):
+    """
+    Parse a JSON file, memory-mapping large files so orjson reads straight from the page cache.
+    
+    Small files, and every file without orjson, go through a plain read.
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    
+    with open(path, 'rb') as f:
+        if orjson is not None and size > MMAP_JSON_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as buf:
+                return orjson.loads(buf)
+        return _loads_json(f.read())
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', buffering: int = OUTPUT_BUFFER_SIZE, **kwargs):
+    """
+    Open path + '.tmp' for writing and move it over path once the block completes.
+    
+    Readers never see a partially written file; if the block raises, the
+    temporary file is removed and path is left untouched.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, mode, buffering=buffering, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _as_literal(pattern: str) -> Optional[str]:
+    """Return the plain text a pattern matches, or None if it uses regex syntax."""
+    literal = re.sub(r'\\(.)', r'\1', pattern)
+    return literal if re.escape(literal) == pattern else None
+
+
+def _classify_handle(handle: str) -> str:
+    """Return the naming pattern key for a product handle"""
+    if _ES_CODE_RE.search(handle):
+        return 'with_es_code'
+    if _AH_CODE_RE.search(handle):
+        return 'with_ah_code'
+    if _NUMBER_RE.search(handle):
+        return 'with_numbers'
+    return 'no_numbers'
 
 
 class SitemapTool:
+    # Fixed attribute set: no per-instance __dict__ and faster attribute lookups
+    __slots__ = (
+        'config', 'base_url', 'session', 'max_concurrent_requests',
+        'log_file', '_log_lines', '_log_flush_interval', '_ts_second', '_ts_str',
+        '_log_lock', '_summary_thread', 'log_fd',
+        'sitemap_urls', '_sitemap_etag', 'url_patterns', '_literal_hits', '_regex_hits',
+        '_cached_json', '_url_list', '_url_seen', '_cat_indices',
+    )
+    
     def __init__(self, config: Dict):
         """
         Initialize the sitemap tool with configuration.
@@ -32,8 +184,26 @@ class SitemapTool:
         self.base_url = config['base_url'].rstrip('/')
         self.session = requests.Session()
         
+        # Keep connections alive in a shared pool and retry transient server errors
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF, status_forcelist=RETRY_STATUSES)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Cap on concurrent sub-sitemap requests (politeness limit)
+        self.max_concurrent_requests = config.get('max_concurrent_requests', 5)
+        
         # Set up logging to file
         self.log_file = config.get('log_file')
+        self._log_lines = 0
+        self._log_flush_interval = config.get('log_flush_interval', LOG_FLUSH_INTERVAL)
+        self._ts_second = 0
+        self._ts_str = ''
+        self._log_lock = threading.Lock()
+        self._summary_thread = None  # Emits the final summary after run_full_analysis returns
         if self.log_file:
             # Create log directory if it doesn't exist
             log_dir = os.path.dirname(self.log_file)
@@ -41,7 +211,7 @@ class SitemapTool:
                 os.makedirs(log_dir)
             
             # Open log file for writing
-            self.log_fd = open(self.log_file, 'w', encoding='utf-8')
+            self.log_fd = open(self.log_file, 'w', encoding='utf-8', buffering=LOG_BUFFER_SIZE)
             self.log(f"Sitemap Tool started at {datetime.now().isoformat()}")
             self.log(f"Target URL: {self.base_url}")
         else:
@@ -64,8 +234,10 @@ class SitemapTool:
             f"{self.base_url}/sitemaps/sitemap.xml",
             f"{self.base_url}/sitemaps/sitemap_index.xml"
         ]
+        self._sitemap_etag = None  # ETag of the sitemap found by find_sitemap, if the server sent one
         
         # URL categorization patterns (optional - for common e-commerce patterns)
+        escaped_base_url = re.escape(self.base_url)
         self.url_patterns = {
             'products': [
                 r'/products/',
@@ -116,192 +288,435 @@ class SitemapTool:
                 r'/find'
             ],
             'home': [
-                r'^' + re.escape(self.base_url) + r'/?$',
-                r'^' + re.escape(self.base_url) + r'/index'
+                r'^' + escaped_base_url + r'/?$',
+                r'^' + escaped_base_url + r'/index'
             ]
         }
         
-        # Initialize with dynamic categories
-        self.categorized_urls = {
-            'all_urls': set(),  # All URLs regardless of category
-            'others': set()     # URLs that don't match any pattern
-        }
+        # Split each category's patterns into plain substrings, checked with a
+        # fast `in` test against the lower-cased URL, and real regexes, which
+        # are compiled into one alternation per category as a fallback
+        self._literal_hits = {}
+        self._regex_hits = {}
+        for category, patterns in self.url_patterns.items():
+            literals = []
+            regexes = []
+            for pattern in patterns:
+                literal = _as_literal(pattern)
+                if literal is not None:
+                    literals.append(literal.lower())
+                else:
+                    regexes.append(pattern)
+            
+            self._literal_hits[category] = tuple(literals)
+            if regexes:
+                self._regex_hits[category] = re.compile('|'.join(f'(?:{p})' for p in regexes), re.IGNORECASE)
+        
+        # Parsed sitemap JSON export, shared by the analysis steps
+        self._cached_json = None
+        
+        # Master URL list in crawl order (deduplicated via _url_seen); each
+        # category stores indices into it rather than its own copy of the URLs
+        self._url_list = []
+        self._url_seen = {}
+        self._cat_indices = {'others': array('I')}  # URLs that don't match any pattern
         
         # Add pattern-based categories dynamically
         for category in self.url_patterns.keys():
-            self.categorized_urls[category] = set()
+            self._cat_indices[category] = array('I')
     
     def log(self, message: str):
         """Log message to both console and file."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}"
-        
-        # Print to console
-        print(formatted_message)
-        
-        # Write to log file if available
-        if self.log_fd:
-            self.log_fd.write(formatted_message + '\n')
-            self.log_fd.flush()
+        # The final summary is logged from a background thread, so keep each message whole
+        with self._log_lock:
+            # Reformat the timestamp only when the wall-clock second changes
+            now = int(time.time())
+            if now != self._ts_second:
+                self._ts_second = now
+                self._ts_str = time.strftime("%H:%M:%S", time.localtime(now))
+            formatted_message = f"[{self._ts_str}] {message}"
+            
+            # Print to console
+            print(formatted_message)
+            
+            # Write to log file if available
+            if self.log_fd:
+                self.log_fd.write(formatted_message + '\n')
+                
+                # Flush periodically rather than per message so `tail -f` stays
+                # useful; an interval of 0 leaves flushing to close_log
+                self._log_lines += 1
+                if self._log_flush_interval and self._log_lines % self._log_flush_interval == 0:
+                    self.log_fd.flush()
+    
+    def banner(self, step: int, title: str):
+        """Log a workflow step heading and its underline as a single message."""
+        self.log(f"\nSTEP {step}: {title}\n{_BAR40}")
+    
+    def wait_for_summary(self):
+        """Block until the final summary started by run_full_analysis has been logged."""
+        if self._summary_thread is not None:
+            self._summary_thread.join()
+            self._summary_thread = None
     
     def close_log(self):
         """Close the log file."""
+        # Let a pending final summary reach the log before it is closed
+        self.wait_for_summary()
+        
         if self.log_fd:
-            self.log(f"Sitemap Tool finished at {datetime.now().isoformat()}")
-            self.log_fd.close()
-            self.log_fd = None
+            # Push the buffered tail to disk even when exiting on an error, and
+            # close the file even if that fails
+            try:
+                self.log(f"Sitemap Tool finished at {datetime.now().isoformat()}")
+                self.log_fd.flush()
+                os.fsync(self.log_fd.fileno())
+            finally:
+                self.log_fd.close()
+                self.log_fd = None
     
     def find_sitemap(self) -> Optional[str]:
         """Find the main sitemap URL."""
         self.log("Searching for sitemap...")
         
-        for sitemap_url in self.sitemap_urls:
-            try:
-                self.log(f"Trying sitemap: {sitemap_url}")
-                response = self.session.head(sitemap_url, timeout=10)
-                self.log(f"Response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    self.log(f"Found sitemap: {sitemap_url}")
-                    return sitemap_url
+        # Probe every location at once; the first location in list order that
+        # answers 200 still wins, but discovery costs a single round trip
+        executor = ThreadPoolExecutor(max_workers=len(self.sitemap_urls))
+        try:
+            futures = [executor.submit(self.session.head, sitemap_url, timeout=10)
+                       for sitemap_url in self.sitemap_urls]
+            
+            for sitemap_url, future in zip(self.sitemap_urls, futures):
+                try:
+                    self.log(f"Trying sitemap: {sitemap_url}")
+                    response = future.result()
+                    self.log(f"Response status: {response.status_code}")
                     
-            except requests.RequestException as e:
-                self.log(f"Error accessing {sitemap_url}: {e}")
-                continue
+                    if response.status_code == 200:
+                        self.log(f"Found sitemap: {sitemap_url}")
+                        self._sitemap_etag = response.headers.get('ETag')
+                        return sitemap_url
+                        
+                except requests.RequestException as e:
+                    self.log(f"Error accessing {sitemap_url}: {e}")
+                    continue
+        finally:
+            # Don't wait on slower, lower-priority probes once we have an answer
+            executor.shutdown(wait=False, cancel_futures=True)
         
         self.log("No sitemap found in common locations")
         return None
     
-    def fetch_sitemap_urls(self, sitemap_url: str) -> List[str]:
-        """Fetch all URLs from sitemap(s)."""
+    def fetch_sitemap_urls(self, sitemap_url: str, sink: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """
+        Fetch all URLs from sitemap(s).
+        
+        Args:
+            sitemap_url: Sitemap or sitemap index to start from
+            sink: Mapping to collect URLs into (created if not given)
+            
+        Returns:
+            The sink, mapping each unique URL to its position in crawl order
+        """
+        if sink is None:
+            sink = {}
+        asyncio.run(self._acrawl(sitemap_url, sink))
+        return sink
+    
+    async def _afetch(self, url: str, session: aiohttp.ClientSession) -> Tuple[str, List[str]]:
+        """
+        Fetch a sitemap document, retrying connection errors, timeouts and RETRY_STATUSES
+        responses up to RETRY_TOTAL times with exponential backoff.
+        """
+        for attempt in range(RETRY_TOTAL + 1):
+            try:
+                return await self._afetch_once(url, session)
+            except aiohttp.ClientResponseError as e:
+                if e.status not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                    raise
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == RETRY_TOTAL:
+                    raise
+            
+            delay = RETRY_BACKOFF * (2 ** attempt)
+            self.log(f"Retrying {url} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    
+    async def _afetch_once(self, url: str, session: aiohttp.ClientSession) -> Tuple[str, List[str]]:
+        """Stream a sitemap document through the XML parser and return its root tag and <loc> values."""
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+        locs = []
+        
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(65536):
+                parser.feed(chunk)
+                root = self._collect_locs(parser, root, locs)
+        
+        parser.close()
+        root = self._collect_locs(parser, root, locs)
+        return root.tag, locs
+    
+    @staticmethod
+    def _collect_locs(parser: ET.XMLPullParser, root: Optional[ET.Element], locs: List[str]) -> ET.Element:
+        """Drain pending parser events into locs, discarding each entry once read."""
+        for event, elem in parser.read_events():
+            if root is None:
+                root = elem
+            elif event == 'end':
+                if elem.tag == _LOC_TAG:
+                    locs.append(elem.text)
+                elif elem.tag in _ENTRY_TAGS:
+                    root.clear()
+        return root
+    
+    async def _acrawl(self, root_url: str, sink: Dict[str, int]):
+        """Crawl a sitemap tree into sink, fetching sub-sitemaps concurrently."""
+        sem = asyncio.Semaphore(self.max_concurrent_requests)
+        connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+        
+        async with aiohttp.ClientSession(headers=dict(self.session.headers), connector=connector) as session:
+            await self._acrawl_child(root_url, sem, session, sink)
+    
+    async def _acrawl_child(self, sitemap_url: str, sem: asyncio.Semaphore,
+                            session: aiohttp.ClientSession, sink: Dict[str, int]):
+        """Fetch one sitemap into sink and recurse into its children if it is an index."""
         self.log(f"Fetching URLs from: {sitemap_url}")
         
         try:
-            response = self.session.get(sitemap_url, timeout=30)
-            response.raise_for_status()
-            
-            # Parse XML
-            root = ET.fromstring(response.content)
+            # Only the request itself holds a slot, so nested indexes can't deadlock
+            async with sem:
+                root_tag, locs = await self._afetch(sitemap_url, session)
             
             # Handle sitemap index
-            if root.tag.endswith('sitemapindex'):
+            if root_tag.endswith('sitemapindex'):
                 self.log("Found sitemap index, processing individual sitemaps...")
-                urls = []
-                for sitemap in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}sitemap'):
-                    loc = sitemap.find('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                    if loc is not None:
-                        sub_urls = self.fetch_sitemap_urls(loc.text)
-                        urls.extend(sub_urls)
-                        time.sleep(0.5)  # Be respectful
-                return urls
-            
-            # Handle regular sitemap
-            elif root.tag.endswith('urlset'):
-                urls = []
-                for url_elem in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}url'):
-                    loc = url_elem.find('{http://www.sitemaps.org/schemas/sitemap/0.9}loc')
-                    if loc is not None:
-                        urls.append(loc.text)
-                
-                self.log(f"Found {len(urls)} URLs in sitemap")
-                return urls
+                await asyncio.gather(*[self._acrawl_child(loc, sem, session, sink) for loc in locs])
+            
+            # Handle regular sitemap; duplicates across sub-sitemaps are dropped here
+            elif root_tag.endswith('urlset'):
+                for loc in locs:
+                    sink.setdefault(loc, len(sink))
+                self.log(f"Found {len(locs)} URLs in sitemap")
             
             else:
-                self.log(f"Unknown XML structure: {root.tag}")
-                return []
+                self.log(f"Unknown XML structure: {root_tag}")
                 
-        except requests.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             self.log(f"Error fetching sitemap: {e}")
-            return []
         except ET.ParseError as e:
             self.log(f"Error parsing XML: {e}")
-            return []
     
-    def categorize_urls(self, urls: List[str]) -> Dict[str, List[str]]:
+    def categorize_urls(self, urls: Iterable[str]) -> Dict[str, List[str]]:
         """Categorize URLs based on patterns while preserving all URLs."""
         self.log("Processing and categorizing URLs...")
         
         # Reset categorized URLs
-        for category in self.categorized_urls:
-            self.categorized_urls[category].clear()
-        
-        # Add ALL URLs to the 'all_urls' category (this is the complete list)
-        self.categorized_urls['all_urls'].update(urls)
-        
-        # Additionally, try to categorize URLs based on patterns for analysis
-        for url in urls:
-            categorized = False
+        for indices in self._cat_indices.values():
+            del indices[:]
+        
+        # Keep ALL unique URLs in the master list (this is the complete list).
+        # A sink from fetch_sitemap_urls is already deduplicated and indexed.
+        if isinstance(urls, dict):
+            self._url_seen = urls
+            self._url_list = list(urls)
+        else:
+            self._url_list = []
+            self._url_seen = {}
+            for url in urls:
+                if self._url_seen.setdefault(url, len(self._url_list)) == len(self._url_list):
+                    self._url_list.append(url)
+        
+        # Additionally, try to categorize URLs based on patterns for analysis.
+        # pyarrow, when enabled, matches every pattern over the whole list at once
+        categories = list(self._literal_hits)
+        hits = None
+        if self.config.get('pyarrow_categorize') and pc is not None:
+            hits = self._vectorized_hits(categories)
+        
+        if hits is None:
+            # Find each URL's first category with a literal hit, in compiled
+            # code when the optional accelerator is built
+            if _fast_categorize is not None:
+                literal_table = tuple(tuple(literal.encode('utf-8') for literal in literals)
+                                      for literals in self._literal_hits.values())
+                hits = _fast_categorize.first_literal_hits(self._url_list, literal_table)
+            else:
+                hits = [self._first_literal_hit(url) for url in self._url_list]
             
-            for category, patterns in self.url_patterns.items():
-                for pattern in patterns:
-                    if re.search(pattern, url, re.IGNORECASE):
-                        self.categorized_urls[category].add(url)
-                        categorized = True
+            # Regex patterns of higher-priority categories still take precedence
+            regex_positions = [(position, self._regex_hits[category])
+                               for position, category in enumerate(categories)
+                               if category in self._regex_hits]
+            for index, (url, hit) in enumerate(zip(self._url_list, hits)):
+                for position, regex in regex_positions:
+                    if position >= hit:
+                        break
+                    if regex.search(url):
+                        hits[index] = position
                         break
-                if categorized:
-                    break
-            
-            if not categorized:
-                self.categorized_urls['others'].add(url)
         
-        # Convert sets to sorted lists
+        # Position len(categories) means no pattern matched
+        targets = [self._cat_indices[category] for category in categories] + [self._cat_indices['others']]
+        for index, hit in enumerate(hits):
+            targets[hit].append(index)
+        
+        return self._category_lists()
+    
+    def _vectorized_hits(self, categories: List[str]) -> Optional[List[int]]:
+        """
+        Find each URL's first matching category with pyarrow string kernels.
+        
+        Returns:
+            Category position per URL (len(categories) for none), or None if a
+            pattern uses syntax pyarrow's regex engine does not support
+        """
+        urls = pa.array(self._url_list, type=pa.string())
+        hits = pa.array([len(categories)] * len(urls), type=pa.int32())
+        
+        try:
+            # Lowest priority first, so higher-priority matches overwrite it
+            for position in reversed(range(len(categories))):
+                category = categories[position]
+                alternatives = [re.escape(literal) for literal in self._literal_hits[category]]
+                if category in self._regex_hits:
+                    alternatives.append(self._regex_hits[category].pattern)
+                if not alternatives:
+                    continue
+                
+                mask = pc.match_substring_regex(urls, '|'.join(alternatives), ignore_case=True)
+                hits = pc.if_else(mask, pa.scalar(position, type=pa.int32()), hits)
+        except pa.ArrowInvalid as e:
+            self.log(f"Vectorized categorization unavailable ({e}); using the per-URL path")
+            return None
+        
+        return hits.to_pylist()
+    
+    def _first_literal_hit(self, url: str) -> int:
+        """Return the position of the first category with a literal pattern in url."""
+        url_lower = url.lower()
+        for position, literals in enumerate(self._literal_hits.values()):
+            for literal in literals:
+                if literal in url_lower:
+                    return position
+        
+        return len(self._literal_hits)
+    
+    def _category_lists(self) -> Dict[str, List[str]]:
+        """Rebuild sorted per-category URL lists from the stored indices."""
+        url_list = self._url_list
         result = {}
-        for category, url_set in self.categorized_urls.items():
-            result[category] = sorted(list(url_set))
+        for category, indices in self._cat_indices.items():
+            result[category] = sorted(url_list[i] for i in indices)
         
         return result
     
+    @staticmethod
+    def _count_urls(categorized_urls: Dict[str, List[str]]) -> int:
+        """Count unique URLs; every URL sits in exactly one category besides 'all_urls'."""
+        return sum(len(urls) for category, urls in categorized_urls.items() if category != 'all_urls')
+    
+    @staticmethod
+    def _with_all_urls(categorized_urls: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Return categorized_urls led by the complete 'all_urls' list, deriving it if missing."""
+        if 'all_urls' in categorized_urls:
+            return categorized_urls
+        
+        all_urls = sorted(chain.from_iterable(categorized_urls.values()))
+        return {'all_urls': all_urls, **categorized_urls}
+    
     def print_summary(self, categorized_urls: Dict[str, List[str]]):
         """Print summary of categorized URLs."""
-        self.log("\n" + "="*60)
+        self.log("\n" + _BAR60)
         self.log("URL SUMMARY")
-        self.log("="*60)
+        self.log(_BAR60)
         
         # Show total URLs first
-        total_urls = len(categorized_urls.get('all_urls', []))
-        self.log(f"Total URLs found: {total_urls:,}")
-        self.log("-" * 40)
+        total_urls = self._count_urls(categorized_urls)
+        self.log("Total URLs found: " + format(total_urls, ',d'))
+        self.log(_RULE40)
         
         # Show all URLs category first
-        if 'all_urls' in categorized_urls:
-            self.log(f"{'ALL URLS':<15}: {len(categorized_urls['all_urls']):>8,} URLs (100.0%)")
-            self.log("  ^ Complete list of all URLs from sitemap")
+        self.log(f"{'ALL URLS':<15}: {total_urls:>8,} URLs (100.0%)")
+        self.log("  ^ Complete list of all URLs from sitemap")
         
         # Show categorized breakdown
         self.log("\nCATEGORIZED BREAKDOWN (for analysis):")
-        self.log("-" * 40)
+        self.log(_RULE40)
         for category, urls in categorized_urls.items():
             if category != 'all_urls':  # Skip all_urls as it's shown above
                 count = len(urls)
                 percentage = (count / total_urls * 100) if total_urls > 0 else 0
                 self.log(f"{category.upper():<15}: {count:>8,} URLs ({percentage:>5.1f}%)")
     
-    def export_to_json(self, categorized_urls: Dict[str, List[str]], filename: str = None):
+    def _domain_name(self) -> str:
+        """Return the site host as a filename-friendly slug, e.g. "example_com"."""
+        host = urlparse(self.base_url).netloc or self.base_url
+        return host.removeprefix('www.').replace('.', '_')
+    
+    def export_to_json(self, categorized_urls: Dict[str, List[str]], filename: str = None,
+                       compact: Optional[bool] = None):
         """Export categorized URLs to JSON file."""
         if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            domain_name = self.base_url.replace('https://', '').replace('http://', '').replace('www.', '').replace('.', '_')
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            domain_name = self._domain_name()
             filename = f"sitemap_urls_{domain_name}_{timestamp}.json"
         
-        export_data = {
-            'metadata': {
-                'base_url': self.base_url,
-                'crawl_date': datetime.now().isoformat(),
-                'total_urls': sum(len(urls) for urls in categorized_urls.values())
-            },
-            'categorized_urls': categorized_urls
+        total_urls = self._count_urls(categorized_urls)
+        metadata = {
+            'base_url': self.base_url,
+            'crawl_date': datetime.now().isoformat(),
+            'total_urls': total_urls
         }
-        
-        with open(filename, 'w', encoding='utf-8') as jsonfile:
-            json.dump(export_data, jsonfile, indent=2, ensure_ascii=False)
+        if self._sitemap_etag:
+            # Lets incremental runs tell whether the sitemap changed since this export
+            metadata['sitemap_etag'] = self._sitemap_etag
+        
+        # The file keeps the complete 'all_urls' list for readers, but it is
+        # only materialized here rather than stored during the crawl
+        categorized_urls = self._with_all_urls(categorized_urls)
+        
+        # Pretty-printing is slow and doubles the file size, so large sites
+        # default to the compact streaming writer
+        if compact is None:
+            compact = self.config.get('compact_json', total_urls > COMPACT_JSON_THRESHOLD)
+        
+        with atomic_write(filename, 'w', encoding='utf-8') as jsonfile:
+            if compact:
+                self._write_json_stream(jsonfile, metadata, categorized_urls)
+            else:
+                export_data = {
+                    'metadata': metadata,
+                    'categorized_urls': categorized_urls
+                }
+                json.dump(export_data, jsonfile, indent=2, ensure_ascii=False)
         
         self.log(f"Exported to {filename}")
         return filename
     
+    @staticmethod
+    def _write_json_stream(jsonfile, metadata: Dict, categorized_urls: Dict[str, List[str]]):
+        """Write the export document incrementally, one URL per line, without indentation."""
+        jsonfile.write('{"metadata": ' + json.dumps(metadata, ensure_ascii=False) + ', "categorized_urls": {')
+        
+        first = True
+        for category, urls in categorized_urls.items():
+            if not first:
+                jsonfile.write(', ')
+            first = False
+            
+            jsonfile.write(json.dumps(category) + ': [')
+            jsonfile.writelines(('\n' if i == 0 else ',\n') + json.dumps(url, ensure_ascii=False)
+                                for i, url in enumerate(urls))
+            jsonfile.write(']')
+        
+        jsonfile.write('}}\n')
+    
     def crawl(self) -> Dict[str, List[str]]:
         """Main crawling method."""
         self.log(f"Starting sitemap crawl for: {self.base_url}")
-        self.log("-" * 60)
+        self.log(_RULE60)
         
         # Find sitemap
         sitemap_url = self.find_sitemap()
@@ -323,13 +738,92 @@ class SitemapTool:
         
         return categorized_urls
     
+    def _find_reusable_export(self) -> Optional[str]:
+        """
+        Find the latest JSON export for this site if it is recent enough to skip the crawl.
+        
+        The newest sitemap_urls_<domain>_<timestamp>.json in the working directory is
+        reused when it is younger than reuse_if_newer_than_s seconds and, if it recorded
+        the sitemap's ETag, the sitemap still reports the same ETag.
+        
+        Returns:
+            Path of the export to reuse, or None to crawl again
+        """
+        max_age = self.config.get('reuse_if_newer_than_s', REUSE_MAX_AGE_S)
+        # Match the _YYYYmmdd_HHMMSS suffix exactly, so "example_com" doesn't also
+        # pick up exports for "example_com_au"
+        stamp = '[0-9]' * 8 + '_' + '[0-9]' * 6
+        pattern = f"sitemap_urls_{glob.escape(self._domain_name())}_{stamp}.json"
+        candidates = glob.glob(pattern)
+        if not candidates:
+            self.log("No previous export found; crawling")
+            return None
+        
+        json_file = max(candidates, key=os.path.getmtime)
+        age = time.time() - os.path.getmtime(json_file)
+        if age > max_age:
+            self.log(f"Previous export {json_file} is {age:.0f}s old (limit {max_age}s); crawling")
+            return None
+        
+        try:
+            data = self._load_json(json_file)
+            metadata = data['metadata']
+            if not isinstance(metadata, dict) or not isinstance(data['categorized_urls'], dict):
+                raise ValueError("unexpected export layout")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.log(f"Previous export {json_file} is unreadable ({type(e).__name__}: {e}); crawling")
+            return None
+        
+        if metadata.get('base_url') != self.base_url:
+            self.log(f"Previous export {json_file} is for {metadata.get('base_url')}; crawling")
+            return None
+        
+        stored_etag = metadata.get('sitemap_etag')
+        if stored_etag:
+            self.find_sitemap()
+            if self._sitemap_etag != stored_etag:
+                self.log(f"Sitemap changed since {json_file} (ETag {stored_etag} -> {self._sitemap_etag}); crawling")
+                return None
+        
+        return json_file
+    
+    def _load_json(self, json_file: str) -> Dict:
+        """Load a sitemap JSON export, reusing the parsed data while the file is unchanged."""
+        stat = os.stat(json_file)
+        key = (os.path.abspath(json_file), stat.st_mtime_ns, stat.st_size)
+        
+        if self._cached_json is None or self._cached_json[0] != key:
+            self._cached_json = (key, _read_json_file(json_file, stat.st_size))
+        
+        return self._cached_json[1]
+    
+    def _resolve_json(self, json_file: Union[str, os.PathLike, Dict]) -> Dict:
+        """Accept either a path to a sitemap JSON export or already-parsed export data."""
+        if isinstance(json_file, (str, os.PathLike)):
+            return self._load_json(json_file)
+        return json_file
+    
+    @staticmethod
+    def _source_label(json_file: Union[str, os.PathLike, Dict], source_file: Optional[str]) -> str:
+        """Name the export a report was built from, for its "Source File:" header."""
+        if source_file:
+            return source_file
+        if isinstance(json_file, (str, os.PathLike)):
+            return os.fspath(json_file)
+        return "<in-memory data>"
+    
     # Analysis methods (from sitemap_analysis.py)
-    def analyze_sitemap_data(self, json_file: str):
-        """Analyze the sitemap JSON data for insights."""
+    def analyze_sitemap_data(self, json_file: Union[str, Dict], product_stats: Optional[Tuple] = None):
+        """
+        Analyze the sitemap JSON data for insights.
+        
+        Args:
+            json_file: Path to the sitemap JSON export, or its parsed data
+            product_stats: Result of _analyze_products for the products, if already computed
+        """
         self.log("Analyzing sitemap data...")
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = self._resolve_json(json_file)
         
         categorized_urls = data['categorized_urls']
         metadata = data['metadata']
@@ -348,60 +842,77 @@ class SitemapTool:
         self.log(f"\nPRODUCT ANALYSIS:")
         self.log(f"Total Products: {len(products)}")
         
-        # Extract product IDs from URLs
-        product_ids = []
-        product_patterns = defaultdict(int)
-        
-        for url in products:
-            # Extract product handle from URL
-            path = urlparse(url).path
-            if '/products/' in path:
-                product_handle = path.split('/products/')[-1]
-                product_ids.append(product_handle)
-                
-                # Analyze product naming patterns
-                if re.search(r'es\d+', product_handle):
-                    product_patterns['with_es_code'] += 1
-                elif re.search(r'ah\d+', product_handle):
-                    product_patterns['with_ah_code'] += 1
-                elif re.search(r'\d+', product_handle):
-                    product_patterns['with_numbers'] += 1
-                else:
-                    product_patterns['no_numbers'] += 1
+        # Extract product IDs, naming patterns and domains in one pass
+        if product_stats is None:
+            product_stats = self._analyze_products(products)
+        product_patterns, domain_counts, total_ids, unique_products = product_stats
         
         self.log(f"\nPRODUCT NAMING PATTERNS:")
         for pattern, count in product_patterns.items():
             self.log(f"{pattern.replace('_', ' ').title():<20}: {count:>6} products")
         
         # Check for duplicates
-        unique_products = set(product_ids)
-        if len(unique_products) != len(product_ids):
+        if unique_products != total_ids:
             self.log(f"\nDUPLICATE DETECTION:")
-            self.log(f"Total product URLs: {len(product_ids)}")
-            self.log(f"Unique product handles: {len(unique_products)}")
-            self.log(f"Duplicates found: {len(product_ids) - len(unique_products)}")
+            self.log(f"Total product URLs: {total_ids}")
+            self.log(f"Unique product handles: {unique_products}")
+            self.log(f"Duplicates found: {total_ids - unique_products}")
         
         # Analyze URL structure
         self.log(f"\nURL STRUCTURE ANALYSIS:")
-        domain_counts = defaultdict(int)
-        for url in products:
-            domain = urlparse(url).netloc
-            domain_counts[domain] += 1
-        
         for domain, count in domain_counts.items():
             self.log(f"{domain}: {count} products")
         
         return {
             'total_products': len(products),
-            'unique_products': len(unique_products),
+            'unique_products': unique_products,
             'product_patterns': dict(product_patterns),
-            'duplicates': len(product_ids) - len(unique_products)
+            'duplicates': total_ids - unique_products
         }
     
+    @staticmethod
+    def _analyze_products(products: List[str]):
+        """Tally naming patterns, domains and duplicate handles for product URLs in a single pass."""
+        product_patterns = Counter()
+        domain_counts = Counter()
+        seen_handles = set()
+        total_handles = 0
+        
+        for url in products:
+            parsed = urlparse(url)
+            domain_counts[parsed.netloc] += 1
+            
+            # Extract product handle from URL and analyze its naming pattern
+            path = parsed.path
+            if '/products/' in path:
+                product_handle = path.rpartition('/products/')[2]
+                total_handles += 1
+                seen_handles.add(product_handle)
+                
+                product_patterns[_classify_handle(product_handle)] += 1
+        
+        return product_patterns, domain_counts, total_handles, len(seen_handles)
+    
+    @staticmethod
+    def _collection_patterns(collections: List[str]) -> Counter:
+        """Count collection handles with and without digits."""
+        collection_patterns = Counter()
+        
+        for url in collections:
+            path = urlparse(url).path
+            if '/collections/' in path:
+                collection_handle = path.rpartition('/collections/')[2]
+                if _NUMBER_RE.search(collection_handle):
+                    collection_patterns['with_numbers'] += 1
+                else:
+                    collection_patterns['no_numbers'] += 1
+        
+        return collection_patterns
+    
     def analyze_product_count(self, actual_count: int):
         """Analyze product count and provide insights."""
         self.log(f"\nPRODUCT COUNT ANALYSIS:")
-        self.log(f"Total Products Found: {actual_count:,}")
+        self.log("Total Products Found: " + format(actual_count, ',d'))
         
         if actual_count == 0:
             self.log("\nNo products found in sitemap. Possible reasons:")
@@ -418,111 +929,149 @@ class SitemapTool:
             self.log(f"\nGood product count found ({actual_count:,} products)")
             self.log("Consider monitoring for changes over time")
     
-    def export_product_handles(self, json_file: str, output_file: str):
+    def export_product_handles(self, json_file: Union[str, Dict], output_file: str):
         """Export all product handles to a CSV file for further analysis."""
         self.log(f"\nExporting product handles to {output_file}...")
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        products = self._resolve_json(json_file)['categorized_urls']['products']
+        self._write_product_csv(output_file, self._product_rows(products), self.config.get('pyarrow_csv', False))
         
-        products = data['categorized_urls']['products']
+        self.log(f"Exported {len(products)} product handles to {output_file}")
+    
+    @staticmethod
+    def _product_rows(products: List[str]) -> Iterable[Tuple[int, str, str]]:
+        """Yield (index, url, handle) CSV rows for the product URLs that carry a handle."""
+        for i, url in enumerate(products, 1):
+            path = urlparse(url).path
+            if '/products/' in path:
+                yield i, url, path.rpartition('/products/')[2]
+    
+    @staticmethod
+    def _write_product_csv(output_file: str, rows: Iterable[Tuple[int, str, str]], use_pyarrow: bool = False):
+        """Write the product handle CSV. Logs nothing, so it can run on a worker thread."""
+        if use_pyarrow and pa_csv is not None:
+            # Arrow's native writer quotes every string field and ends lines
+            # with "\n"; the parsed contents match the csv module's output
+            schema = pa.schema([('Index', pa.int64()), ('Product_URL', pa.string()),
+                                ('Product_Handle', pa.string())])
+            rows = iter(rows)
+            with atomic_write(output_file, 'wb') as csvfile, pa_csv.CSVWriter(csvfile, schema) as writer:
+                for batch in iter(lambda: list(islice(rows, CSV_BATCH_SIZE)), []):
+                    writer.write_batch(pa.RecordBatch.from_arrays(
+                        [pa.array(column, type=field.type) for column, field in zip(zip(*batch), schema)],
+                        schema=schema))
+            return
         
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
+        with atomic_write(output_file, 'w', buffering=CSV_BUFFER_SIZE, newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(['Index', 'Product_URL', 'Product_Handle'])
             
-            for i, url in enumerate(products, 1):
-                path = urlparse(url).path
-                if '/products/' in path:
-                    product_handle = path.split('/products/')[-1]
-                    writer.writerow([i, url, product_handle])
-        
-        self.log(f"Exported {len(products)} product handles to {output_file}")
+            # writerows consumes a generator as it goes, so the rows are never
+            # all held in memory
+            writer.writerows(rows)
     
-    def list_all_urls(self, json_file: str):
+    def list_all_urls(self, json_file: Union[str, Dict]):
         """List all URLs from the sitemap data organized by category."""
         self.log("\nListing all URLs from sitemap...")
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = self._resolve_json(json_file)
         
         categorized_urls = data['categorized_urls']
-        metadata = data['metadata']
         
         all_urls = []
         category_stats = {}
         
-        # First, show ALL URLs (complete list from sitemap)
-        if 'all_urls' in categorized_urls:
-            urls = categorized_urls['all_urls']
-            category_stats['all_urls'] = len(urls)
-            self.log(f"\nALL URLS FROM SITEMAP ({len(urls)} URLs):")
-            self.log("=" * 60)
-            self.log("This is the complete list of all URLs found in the sitemap")
-            self.log("-" * 60)
-            
+        # ALL URLs (complete list from sitemap) first, then categorized URLs
+        ordered = sorted(categorized_urls.items(), key=lambda item: item[0] != 'all_urls')
+        for category, urls in ordered:
+            category_stats[category] = len(urls)
             for i, url in enumerate(urls, 1):
+                parsed = urlparse(url)
                 all_urls.append({
-                    'category': 'all_urls',
+                    'category': category,
                     'index': i,
                     'url': url,
-                    'domain': urlparse(url).netloc,
-                    'path': urlparse(url).path
+                    'domain': parsed.netloc,
+                    'path': parsed.path
                 })
-                self.log(f"{i:>6}: {url}")
         
-        # Then show categorized URLs (for additional analysis)
-        self.log(f"\n" + "=" * 60)
-        self.log("CATEGORIZED URLS (for analysis purposes)")
-        self.log("=" * 60)
-        self.log("These are the same URLs organized by patterns for analysis")
-        self.log("-" * 60)
+        return all_urls, category_stats
+    
+    def list_all_urls_summary(self, json_file: Union[str, Dict]) -> Tuple[int, Counter]:
+        """Count unique URLs and URLs per category without building per-URL records."""
+        categorized_urls = self._resolve_json(json_file)['categorized_urls']
         
+        category_counts = Counter()
         for category, urls in categorized_urls.items():
+            if category != 'all_urls':  # Every URL is also in exactly one category
+                category_counts[category] = len(urls)
+        
+        return sum(category_counts.values()), category_counts
+    
+    def _dump_urls_to_console(self, all_urls: List[Dict], category_stats: Dict[str, int]):
+        """Print the URL listing from list_all_urls in one write, without log timestamps."""
+        lines = []
+        position = 0
+        
+        # First, show ALL URLs (complete list from sitemap)
+        if 'all_urls' in category_stats:
+            count = category_stats['all_urls']
+            lines.append(f"\nALL URLS FROM SITEMAP ({count} URLs):")
+            lines.append(_BAR60)
+            lines.append("This is the complete list of all URLs found in the sitemap")
+            lines.append(_RULE60)
+            lines.extend(f"{record['index']:>6}: {record['url']}" for record in all_urls[:count])
+            position = count
+        
+        # Then show categorized URLs (for additional analysis)
+        lines.append("\n" + _BAR60)
+        lines.append("CATEGORIZED URLS (for analysis purposes)")
+        lines.append(_BAR60)
+        lines.append("These are the same URLs organized by patterns for analysis")
+        lines.append(_RULE60)
+        
+        for category, count in category_stats.items():
             if category != 'all_urls':  # Skip all_urls as it's shown above
-                category_stats[category] = len(urls)
-                self.log(f"\n{category.upper()} ({len(urls)} URLs):")
-                self.log("-" * 50)
-                
-                for i, url in enumerate(urls, 1):
-                    all_urls.append({
-                        'category': category,
-                        'index': i,
-                        'url': url,
-                        'domain': urlparse(url).netloc,
-                        'path': urlparse(url).path
-                    })
-                    self.log(f"{i:>6}: {url}")
+                lines.append(f"\n{category.upper()} ({count} URLs):")
+                lines.append(_RULE50)
+                lines.extend(f"{record['index']:>6}: {record['url']}"
+                             for record in all_urls[position:position + count])
+                position += count
         
-        return all_urls, category_stats
+        sys.stdout.write("\n".join(lines) + "\n")
     
-    def generate_comprehensive_log(self, json_file: str, log_prefix: str = "sitemap_comprehensive"):
+    def generate_comprehensive_log(self, json_file: Union[str, Dict], log_prefix: str = "sitemap_comprehensive",
+                                   source_file: Optional[str] = None):
         """Generate a comprehensive log file with all URLs and analysis."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         log_file = f"{log_prefix}_{timestamp}.txt"
         
         self.log(f"\nGenerating comprehensive log: {log_file}")
-        
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
+        self._write_comprehensive_log(log_file, self._resolve_json(json_file),
+                                      self._source_label(json_file, source_file))
+        self.log(f"Comprehensive log generated: {log_file}")
+        return log_file
+    
+    @staticmethod
+    def _write_comprehensive_log(log_file: str, data: Dict, source_file: str):
+        """Write the comprehensive log file. Logs nothing, so it can run on a worker thread."""
         categorized_urls = data['categorized_urls']
         metadata = data['metadata']
         
-        with open(log_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
+        with atomic_write(log_file, 'w', encoding='utf-8') as f:
+            f.write(_BAR80 + "\n")
             f.write("SITEMAP COMPREHENSIVE ANALYSIS LOG\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Source File: {json_file}\n")
+            f.write(_BAR80 + "\n")
+            f.write(f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Source File: {source_file}\n")
             f.write(f"Base URL: {metadata['base_url']}\n")
             f.write(f"Crawl Date: {metadata['crawl_date']}\n")
             f.write(f"Total URLs: {metadata['total_urls']:,}\n")
-            f.write("=" * 80 + "\n\n")
+            f.write(_BAR80 + "\n\n")
             
             # Summary statistics
             f.write("CATEGORY SUMMARY:\n")
-            f.write("-" * 40 + "\n")
+            f.write(_RULE40 + "\n")
             for category, urls in categorized_urls.items():
                 f.write(f"{category.upper():<15}: {len(urls):>8,} URLs\n")
             f.write("\n")
@@ -531,71 +1080,78 @@ class SitemapTool:
             if 'all_urls' in categorized_urls:
                 urls = categorized_urls['all_urls']
                 f.write(f"\nALL URLS FROM SITEMAP ({len(urls)} total):\n")
-                f.write("=" * 60 + "\n")
+                f.write(_BAR60 + "\n")
                 f.write("This is the complete list of all URLs found in the sitemap\n")
-                f.write("-" * 60 + "\n")
+                f.write(_RULE60 + "\n")
                 
-                for i, url in enumerate(urls, 1):
-                    f.write(f"{i:>6}: {url}\n")
+                f.writelines(f"{i:>6}: {url}\n" for i, url in enumerate(urls, 1))
                 
                 f.write(f"\nEnd of ALL URLS FROM SITEMAP\n")
-                f.write("-" * 60 + "\n")
+                f.write(_RULE60 + "\n")
             
             # Then show categorized URLs (for analysis)
             f.write(f"\nCATEGORIZED URLS (for analysis purposes):\n")
-            f.write("=" * 60 + "\n")
+            f.write(_BAR60 + "\n")
             f.write("These are the same URLs organized by patterns for analysis\n")
-            f.write("-" * 60 + "\n")
+            f.write(_RULE60 + "\n")
             
             for category, urls in categorized_urls.items():
                 if category != 'all_urls':  # Skip all_urls as it's shown above
                     f.write(f"\n{category.upper()} URLs ({len(urls)} total):\n")
-                    f.write("=" * 60 + "\n")
+                    f.write(_BAR60 + "\n")
                     
-                    for i, url in enumerate(urls, 1):
-                        f.write(f"{i:>6}: {url}\n")
+                    f.writelines(f"{i:>6}: {url}\n" for i, url in enumerate(urls, 1))
                     
                     f.write(f"\nEnd of {category.upper()} URLs\n")
-                    f.write("-" * 60 + "\n")
-        
-        self.log(f"Comprehensive log generated: {log_file}")
-        return log_file
+                    f.write(_RULE60 + "\n")
     
-    def generate_url_analysis_log(self, json_file: str, log_prefix: str = "sitemap_analysis"):
+    def generate_url_analysis_log(self, json_file: Union[str, Dict], log_prefix: str = "sitemap_analysis",
+                                  source_file: Optional[str] = None):
         """Generate a detailed analysis log with insights and statistics."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         log_file = f"{log_prefix}_{timestamp}.txt"
         
         self.log(f"\nGenerating analysis log: {log_file}")
+        self._write_analysis_log(log_file, self._resolve_json(json_file),
+                                 self._source_label(json_file, source_file))
+        self.log(f"Analysis log generated: {log_file}")
+        return log_file
+    
+    @staticmethod
+    def _write_analysis_log(log_file: str, data: Dict, source_file: str, product_stats: Optional[Tuple] = None,
+                            collection_patterns: Optional[Counter] = None):
+        """
+        Write the analysis log file. Logs nothing, so it can run on a worker thread.
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
+        product_stats and collection_patterns take the results of _analyze_products and
+        _collection_patterns when the caller has already computed them.
+        """
         categorized_urls = data['categorized_urls']
         metadata = data['metadata']
         
-        with open(log_file, 'w', encoding='utf-8') as f:
-            f.write("=" * 80 + "\n")
+        with atomic_write(log_file, 'w', encoding='utf-8') as f:
+            f.write(_BAR80 + "\n")
             f.write("SITEMAP ANALYSIS AND INSIGHTS LOG\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Source File: {json_file}\n")
-            f.write("=" * 80 + "\n\n")
+            f.write(_BAR80 + "\n")
+            f.write(f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Source File: {source_file}\n")
+            f.write(_BAR80 + "\n\n")
             
             # Basic metadata
             f.write("BASIC INFORMATION:\n")
-            f.write("-" * 40 + "\n")
+            f.write(_RULE40 + "\n")
             f.write(f"Base URL: {metadata['base_url']}\n")
             f.write(f"Crawl Date: {metadata['crawl_date']}\n")
             f.write(f"Total URLs: {metadata['total_urls']:,}\n\n")
             
             # Category breakdown
             f.write("CATEGORY BREAKDOWN:\n")
-            f.write("-" * 40 + "\n")
+            f.write(_RULE40 + "\n")
             total_urls = 0
             for category, urls in categorized_urls.items():
                 count = len(urls)
-                total_urls += count
+                if category != 'all_urls':  # Already counted by the categories
+                    total_urls += count
                 percentage = (count / metadata['total_urls'] * 100) if metadata['total_urls'] > 0 else 0
                 f.write(f"{category.upper():<15}: {count:>8,} URLs ({percentage:>5.1f}%)\n")
             f.write(f"{'TOTAL':<15}: {total_urls:>8,} URLs\n\n")
@@ -604,29 +1160,13 @@ class SitemapTool:
             if 'products' in categorized_urls:
                 products = categorized_urls['products']
                 f.write("PRODUCT ANALYSIS:\n")
-                f.write("-" * 40 + "\n")
+                f.write(_RULE40 + "\n")
                 f.write(f"Total Products: {len(products):,}\n")
                 
-                # Product naming patterns
-                product_patterns = defaultdict(int)
-                domain_counts = defaultdict(int)
-                
-                for url in products:
-                    domain = urlparse(url).netloc
-                    domain_counts[domain] += 1
-                    
-                    path = urlparse(url).path
-                    if '/products/' in path:
-                        product_handle = path.split('/products/')[-1]
-                        
-                        if re.search(r'es\d+', product_handle):
-                            product_patterns['with_es_code'] += 1
-                        elif re.search(r'ah\d+', product_handle):
-                            product_patterns['with_ah_code'] += 1
-                        elif re.search(r'\d+', product_handle):
-                            product_patterns['with_numbers'] += 1
-                        else:
-                            product_patterns['no_numbers'] += 1
+                # Product naming patterns, domains and handles in one pass
+                if product_stats is None:
+                    product_stats = SitemapTool._analyze_products(products)
+                product_patterns, domain_counts, total_handles, unique_handles = product_stats
                 
                 f.write("\nProduct Naming Patterns:\n")
                 for pattern, count in product_patterns.items():
@@ -639,37 +1179,22 @@ class SitemapTool:
                     f.write(f"  {domain:<30}: {count:>6,} ({percentage:>5.1f}%)\n")
                 
                 # Check for duplicates
-                product_handles = []
-                for url in products:
-                    path = urlparse(url).path
-                    if '/products/' in path:
-                        product_handle = path.split('/products/')[-1]
-                        product_handles.append(product_handle)
-                
-                unique_handles = set(product_handles)
-                if len(unique_handles) != len(product_handles):
+                if unique_handles != total_handles:
                     f.write(f"\nDuplicate Detection:\n")
-                    f.write(f"  Total product URLs: {len(product_handles):,}\n")
-                    f.write(f"  Unique product handles: {len(unique_handles):,}\n")
-                    f.write(f"  Duplicates found: {len(product_handles) - len(unique_handles):,}\n")
+                    f.write(f"  Total product URLs: {total_handles:,}\n")
+                    f.write(f"  Unique product handles: {unique_handles:,}\n")
+                    f.write(f"  Duplicates found: {total_handles - unique_handles:,}\n")
             
             # Collection analysis
             if 'collections' in categorized_urls:
                 collections = categorized_urls['collections']
                 f.write(f"\nCOLLECTION ANALYSIS:\n")
-                f.write("-" * 40 + "\n")
+                f.write(_RULE40 + "\n")
                 f.write(f"Total Collections: {len(collections):,}\n")
                 
                 # Collection patterns
-                collection_patterns = defaultdict(int)
-                for url in collections:
-                    path = urlparse(url).path
-                    if '/collections/' in path:
-                        collection_handle = path.split('/collections/')[-1]
-                        if re.search(r'\d+', collection_handle):
-                            collection_patterns['with_numbers'] += 1
-                        else:
-                            collection_patterns['no_numbers'] += 1
+                if collection_patterns is None:
+                    collection_patterns = SitemapTool._collection_patterns(collections)
                 
                 f.write("\nCollection Naming Patterns:\n")
                 for pattern, count in collection_patterns.items():
@@ -680,19 +1205,19 @@ class SitemapTool:
             if 'blogs' in categorized_urls:
                 blogs = categorized_urls['blogs']
                 f.write(f"\nBLOG ANALYSIS:\n")
-                f.write("-" * 40 + "\n")
+                f.write(_RULE40 + "\n")
                 f.write(f"Total Blog Posts: {len(blogs):,}\n")
             
             # Page analysis
             if 'pages' in categorized_urls:
                 pages = categorized_urls['pages']
                 f.write(f"\nPAGE ANALYSIS:\n")
-                f.write("-" * 40 + "\n")
+                f.write(_RULE40 + "\n")
                 f.write(f"Total Pages: {len(pages):,}\n")
             
             # Recommendations
             f.write(f"\nRECOMMENDATIONS:\n")
-            f.write("-" * 40 + "\n")
+            f.write(_RULE40 + "\n")
             f.write("1. Monitor sitemap generation frequency and timing\n")
             f.write("2. Check for products in draft/archived status\n")
             f.write("3. Verify sitemap generation settings in Shopify\n")
@@ -700,95 +1225,157 @@ class SitemapTool:
             f.write("5. Check product visibility and publication settings\n")
             f.write("6. Monitor for URL structure changes\n")
             f.write("7. Validate all URLs for accessibility\n")
+    
+    def _single_pass(self, data: Dict) -> Dict:
+        """
+        Tally the product and collection URLs once for both step 3 and the analysis log.
         
-        self.log(f"Analysis log generated: {log_file}")
-        return log_file
+        Only these stats are shared. The listings in the comprehensive log and the CSV rows
+        are still formatted as they are written, so memory does not grow with the URL count.
+        
+        Returns:
+            Dict with product_stats (the _analyze_products result) and collection_patterns
+            (the _collection_patterns result, or None without a collections category)
+        """
+        categorized_urls = data['categorized_urls']
+        
+        collection_patterns = None
+        if 'collections' in categorized_urls:
+            collection_patterns = self._collection_patterns(categorized_urls['collections'])
+        
+        return {
+            'product_stats': self._analyze_products(categorized_urls['products']),
+            'collection_patterns': collection_patterns
+        }
     
     def run_full_analysis(self):
         """Run the complete crawl and analysis workflow."""
-        self.log("=" * 80)
+        self.log(_BAR80)
         self.log("UNIFIED SITEMAP CRAWLER AND ANALYSIS TOOL")
-        self.log("=" * 80)
+        self.log(_BAR80)
         
-        # Step 1: Crawl sitemap
-        self.log("\nSTEP 1: CRAWLING SITEMAP")
-        self.log("=" * 40)
-        categorized_urls = self.crawl()
+        # Incremental mode: a fresh, unchanged export from an earlier run replaces steps 1-2
+        json_file = None
+        if self.config.get('incremental'):
+            json_file = self._find_reusable_export()
         
-        if not categorized_urls:
-            self.log("Crawling failed. Exiting.")
-            return
-        
-        # Step 2: Export to JSON
-        self.log("\nSTEP 2: EXPORTING DATA")
-        self.log("=" * 40)
-        json_file = self.export_to_json(categorized_urls)
-        
-        # Step 3: Analyze data
-        self.log("\nSTEP 3: ANALYZING DATA")
-        self.log("=" * 40)
-        analysis = self.analyze_sitemap_data(json_file)
-        
-        # Step 4: Analyze product count
-        self.log("\nSTEP 4: PRODUCT COUNT ANALYSIS")
-        self.log("=" * 40)
-        self.analyze_product_count(analysis['total_products'])
-        
-        # Step 5: List all URLs
-        self.log("\nSTEP 5: LISTING ALL URLS")
-        self.log("=" * 40)
-        all_urls, category_stats = self.list_all_urls(json_file)
-        
-        # Step 6: Generate comprehensive logs
-        self.log("\nSTEP 6: GENERATING LOG FILES")
-        self.log("=" * 40)
-        comprehensive_log = self.generate_comprehensive_log(json_file)
-        analysis_log = self.generate_url_analysis_log(json_file)
-        
-        # Step 7: Export product handles
-        self.log("\nSTEP 7: EXPORTING PRODUCT HANDLES")
-        self.log("=" * 40)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        domain_name = self.base_url.replace('https://', '').replace('http://', '').replace('www.', '').replace('.', '_')
+        if json_file:
+            self.log(f"\nReusing {json_file}; skipping steps 1-2 (crawl and export)")
+        else:
+            # Step 1: Crawl sitemap
+            self.banner(1, "CRAWLING SITEMAP")
+            categorized_urls = self.crawl()
+            
+            if not categorized_urls:
+                self.log("Crawling failed. Exiting.")
+                return
+            
+            # Step 2: Export to JSON
+            self.banner(2, "EXPORTING DATA")
+            json_file = self.export_to_json(categorized_urls)
+        
+        # Load the export once; steps 3-7 all work from the parsed data
+        data = self._load_json(json_file)
+        
+        # Steps 6 and 7 only write files from the parsed data, so start them in
+        # the background while steps 3-5 report to the console. The workers log
+        # nothing; their progress lines are logged here as each one is collected.
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        domain_name = self._domain_name()
+        comprehensive_log = f"sitemap_comprehensive_{timestamp}.txt"
+        analysis_log = f"sitemap_analysis_{timestamp}.txt"
         csv_file = f"sitemap_product_handles_{domain_name}_{timestamp}.csv"
-        self.export_product_handles(json_file, csv_file)
-        
-        # Final summary
-        self.log(f"\n" + "=" * 80)
-        self.log("ANALYSIS COMPLETE")
-        self.log("=" * 80)
-        self.log(f"Generated Files:")
-        self.log(f"  1. JSON Data: {json_file}")
-        self.log(f"  2. Comprehensive Log: {comprehensive_log}")
-        self.log(f"  3. Analysis Log: {analysis_log}")
-        self.log(f"  4. Product Handles CSV: {csv_file}")
-        self.log(f"\nTotal URLs Processed: {len(all_urls):,}")
-        self.log(f"Categories Found: {len(category_stats)}")
-        
-        self.log(f"\nRECOMMENDATIONS:")
-        self.log("1. Check your admin panel for draft/archived products")
-        self.log("2. Verify sitemap generation settings")
-        self.log("3. Compare with your product database directly")
-        self.log("4. Check if any products have specific visibility rules")
-        self.log("5. Consider the timing of sitemap generation")
-        self.log("6. Review the generated log files for detailed insights")
+        products = data['categorized_urls']['products']
         
-        return {
+        # Product and collection stats are shared by step 3 and the analysis log
+        tallies = self._single_pass(data)
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            comprehensive_future = executor.submit(self._write_comprehensive_log, comprehensive_log, data, json_file)
+            analysis_future = executor.submit(self._write_analysis_log, analysis_log, data, json_file,
+                                              tallies['product_stats'], tallies['collection_patterns'])
+            csv_future = executor.submit(self._write_product_csv, csv_file, self._product_rows(products),
+                                         self.config.get('pyarrow_csv', False))
+            
+            # Step 3: Analyze data
+            self.banner(3, "ANALYZING DATA")
+            analysis = self.analyze_sitemap_data(data, tallies['product_stats'])
+            
+            # Step 4: Analyze product count
+            self.banner(4, "PRODUCT COUNT ANALYSIS")
+            self.analyze_product_count(analysis['total_products'])
+            
+            # Step 5: List all URLs
+            self.banner(5, "LISTING ALL URLS")
+            total_urls, category_counts = self.list_all_urls_summary(data)
+            if self.config.get('list_urls'):
+                all_urls, category_stats = self.list_all_urls(data)
+                self._dump_urls_to_console(all_urls, category_stats)
+            else:
+                self.log(format(total_urls, ',d') + f" URLs in {len(category_counts)} categories "
+                         "(listed in the comprehensive log; use --list-urls to print them here)")
+            
+            # Step 6: Generate comprehensive logs
+            self.banner(6, "GENERATING LOG FILES")
+            self.log(f"\nGenerating comprehensive log: {comprehensive_log}")
+            comprehensive_future.result()
+            self.log(f"Comprehensive log generated: {comprehensive_log}")
+            
+            self.log(f"\nGenerating analysis log: {analysis_log}")
+            analysis_future.result()
+            self.log(f"Analysis log generated: {analysis_log}")
+            
+            # Step 7: Export product handles
+            self.banner(7, "EXPORTING PRODUCT HANDLES")
+            self.log(f"\nExporting product handles to {csv_file}...")
+            csv_future.result()
+            self.log(f"Exported {len(products)} product handles to {csv_file}")
+        
+        results = {
             'json_file': json_file,
             'comprehensive_log': comprehensive_log,
             'analysis_log': analysis_log,
             'csv_file': csv_file,
-            'total_urls': len(all_urls),
-            'categories': len(category_stats)
+            'total_urls': total_urls,
+            # Counts 'all_urls' as a category, as the URL listing always has
+            'categories': len(data['categorized_urls'])
         }
+        
+        # Log the final summary in the background so callers get the results
+        # right away; close_log waits for it
+        self._summary_thread = threading.Thread(target=self._emit_summary, args=(results,))
+        self._summary_thread.start()
+        
+        return results
+    
+    def _emit_summary(self, results: Dict):
+        """Log the generated files, totals and recommendations for a finished analysis."""
+        total_urls = format(results['total_urls'], ',d')
+        
+        # A single message, so lines the caller logs meanwhile can't land inside it
+        self.log(f"\n{_BAR80}\n"
+                 f"ANALYSIS COMPLETE\n"
+                 f"{_BAR80}\n"
+                 f"Generated Files:\n"
+                 f"  1. JSON Data: {results['json_file']}\n"
+                 f"  2. Comprehensive Log: {results['comprehensive_log']}\n"
+                 f"  3. Analysis Log: {results['analysis_log']}\n"
+                 f"  4. Product Handles CSV: {results['csv_file']}\n"
+                 f"\nTotal URLs Processed: {total_urls}\n"
+                 f"Categories Found: {results['categories']}\n"
+                 "\nRECOMMENDATIONS:\n"
+                 "1. Check your admin panel for draft/archived products\n"
+                 "2. Verify sitemap generation settings\n"
+                 "3. Compare with your product database directly\n"
+                 "4. Check if any products have specific visibility rules\n"
+                 "5. Consider the timing of sitemap generation\n"
+                 "6. Review the generated log files for detailed insights")
 
 
 def load_config(config_file: str) -> Dict:
     """Load configuration from JSON file."""
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        return config
+        return _read_json_file(config_file)
     except FileNotFoundError:
         print(f"Error: Configuration file '{config_file}' not found.")
         sys.exit(1)
@@ -800,11 +1387,23 @@ def load_config(config_file: str) -> Dict:
 def main():
     parser = argparse.ArgumentParser(description='Unified Sitemap Crawler and Analysis Tool')
     parser.add_argument('config_file', help='Path to configuration JSON file')
+    parser.add_argument('--compact', action='store_true',
+                        help=f'Write compact JSON output (default for sites over {COMPACT_JSON_THRESHOLD:,} URLs)')
+    parser.add_argument('--list-urls', action='store_true',
+                        help='Print every URL to the console in step 5')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse the latest JSON export instead of crawling if it is still fresh')
     
     args = parser.parse_args()
     
     # Load configuration
     config = load_config(args.config_file)
+    if args.compact:
+        config['compact_json'] = True
+    if args.list_urls:
+        config['list_urls'] = True
+    if args.incremental:
+        config['incremental'] = True
     
     # Initialize tool
     tool = SitemapTool(config)
@@ -814,6 +1413,8 @@ def main():
         results = tool.run_full_analysis()
         
         if results:
+            # Keep this line after the summary, which is logged in the background
+            tool.wait_for_summary()
             tool.log(f"\nDetailed log saved to: {tool.log_file}")
         
     except Exception as e:
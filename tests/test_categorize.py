@@ -0,0 +1,137 @@
+"""
+Equivalence checks for the URL categorization backends and the product handle classifier.
+
+Each backend (pure Python substring checks + regex fallback, the optional
+Cython accelerator, and the opt-in pyarrow kernels) is compared against a
+straightforward reference: the original nested loop of re.search calls, where
+the first matching category wins. Product handles are compared against the
+original es/ah/number chain.
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import random
+import re
+import unittest
+from unittest import mock
+
+import sitemap_tool
+
+
+BASE_URL = 'https://shop.example.com'
+
+# Path pieces chosen to hit every category, overlapping fragments and the
+# regex-only patterns (nested /products/, anchored home URLs, query strings)
+SEGMENTS = [
+    'products', 'product', 'p', 'item', 'shop', 'collections', 'collection',
+    'categories', 'category', 'browse', 'blogs', 'blog', 'news', 'articles',
+    'journal', 'pages', 'page', 'about', 'about-us', 'contact', 'privacy', 'terms',
+    'shipping', 'returns', 'faq', 'help', 'support', 'cart', 'checkout', 'checkouts',
+    'orders', 'account', 'search', 'find', 'index', 'index.html', 'Products',
+    'COLLECTIONS', 'Search', 'widget-es12', 'ah7', 'sale', '', 'x',
+]
+HOSTS = [BASE_URL, BASE_URL.upper(), 'https://other.example.org', 'http://shop.example.com']
+
+
+def reference_categorize(url_patterns, urls):
+    """Categorize with the original nested re.search loop; first category wins."""
+    result = {category: set() for category in url_patterns}
+    result['others'] = set()
+
+    for url in urls:
+        for category, patterns in url_patterns.items():
+            if any(re.search(pattern, url, re.IGNORECASE) for pattern in patterns):
+                result[category].add(url)
+                break
+        else:
+            result['others'].add(url)
+
+    return {category: sorted(found) for category, found in result.items()}
+
+
+def reference_handle_pattern(handle):
+    """Classify a product handle with the original chain of re.search calls."""
+    if re.search(r'es\d+', handle):
+        return 'with_es_code'
+    elif re.search(r'ah\d+', handle):
+        return 'with_ah_code'
+    elif re.search(r'\d+', handle):
+        return 'with_numbers'
+    return 'no_numbers'
+
+
+def random_urls(count, seed=0):
+    """Build a reproducible mix of URLs that exercises every category."""
+    rng = random.Random(seed)
+    urls = [BASE_URL, BASE_URL + '/', BASE_URL + '/index', BASE_URL.upper() + '/',
+            BASE_URL + '/search?q=shoes', BASE_URL + '/collections/sale/products/red-es1']
+
+    for _ in range(count):
+        path = '/'.join(rng.choice(SEGMENTS) for _ in range(rng.randint(0, 4)))
+        url = f"{rng.choice(HOSTS)}/{path}"
+        if rng.random() < 0.1:
+            url += '?' + rng.choice(['q=cart', 'page=2', 'ref=/products/x'])
+        urls.append(url)
+
+    return urls
+
+
+class CategorizeEquivalenceTest(unittest.TestCase):
+    def setUp(self):
+        self.urls = random_urls(5000)
+
+    def categorize(self, config=None, **backends):
+        """Run SitemapTool.categorize_urls with the given backend modules patched in."""
+        with contextlib.ExitStack() as stack:
+            for name, value in backends.items():
+                stack.enter_context(mock.patch.object(sitemap_tool, name, value))
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+            tool = sitemap_tool.SitemapTool({'base_url': BASE_URL, **(config or {})})
+            expected = reference_categorize(tool.url_patterns, self.urls)
+            result = tool.categorize_urls(self.urls)
+        return {category: result[category] for category in expected}, expected
+
+    def test_python_backend(self):
+        actual, expected = self.categorize(_fast_categorize=None)
+        self.assertEqual(actual, expected)
+
+    def test_cython_backend(self):
+        if sitemap_tool._fast_categorize is None:
+            self.skipTest("_fast_categorize is not built")
+        actual, expected = self.categorize()
+        self.assertEqual(actual, expected)
+
+    def test_pyarrow_backend(self):
+        if sitemap_tool.pc is None:
+            self.skipTest("pyarrow is not installed")
+        actual, expected = self.categorize({'pyarrow_categorize': True}, _fast_categorize=None)
+        self.assertEqual(actual, expected)
+
+
+class HandleClassifierEquivalenceTest(unittest.TestCase):
+    def test_matches_reference(self):
+        rng = random.Random(0)
+        handles = ['', 'es', 'es1', 'ah1', '1es2', 'ah1-es2', 'es-1', 'shoe-9', 'ahes3', 'ES1']
+        handles += [''.join(rng.choice('aehs019-') for _ in range(rng.randint(0, 12)))
+                    for _ in range(5000)]
+
+        for handle in handles:
+            self.assertEqual(sitemap_tool._classify_handle(handle),
+                             reference_handle_pattern(handle), handle)
+
+    def test_digit_check_matches_reference(self):
+        rng = random.Random(1)
+        handles = ['', 'sale', 'sale-2024', '0', 'summer-sale-v2']
+        handles += [''.join(rng.choice('abs09-') for _ in range(rng.randint(0, 12)))
+                    for _ in range(5000)]
+
+        for handle in handles:
+            self.assertEqual(bool(sitemap_tool._NUMBER_RE.search(handle)),
+                             bool(re.search(r'\d+', handle)), handle)
+
+
+if __name__ == '__main__':
+    unittest.main()